@@ -23,6 +23,21 @@ function escapeHtml(s) {
     .replace(/>/g, '&gt;');
 }
 
+// last30 中的 OHLC 为原始数值，这里统一格式化为两位小数（缺失值显示为空）
+function formatLast30(data) {
+  if (!data || !Array.isArray(data.last30)) return data;
+  const priceKeys = ['Open', 'High', 'Low', 'Close'];
+  const last30 = data.last30.map(row => {
+    const out = { ...row };
+    priceKeys.forEach(k => {
+      if (!(k in out)) return;
+      out[k] = typeof out[k] === 'number' ? out[k].toFixed(2) : (out[k] == null ? '' : out[k]);
+    });
+    return out;
+  });
+  return { ...data, last30 };
+}
+
 function renderComplexValue(value) {
   if (value === null) return '<span class="null">null</span>';
   if (typeof value === 'string' || typeof value === 'number' || typeof value === 'boolean') {
@@ -115,7 +130,7 @@ async function main() {
   try {
     const raw = await fs.readFile(JSON_FILE, 'utf8');
     const data = JSON.parse(raw);
-    const html = generateHtmlFromJson(data);
+    const html = generateHtmlFromJson(formatLast30(data));
     await fs.writeFile(OUT_FILE, html, 'utf8');
     console.log(`成功：已生成 ${OUT_FILE}`);
   } catch (err) {
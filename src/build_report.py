@@ -1,41 +1,65 @@
 # -*- coding: utf-8 -*-
 import io
-import json
-import math
 import os
+import re
 from datetime import datetime, timezone
 
 import numpy as np
+import orjson
 import pandas as pd
-import requests
 import yfinance as yf
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 
-from indicators import enrich_indicators
+from http_client import SESSION
+from indicator_cache import get_or_compute
+from indicators import enrich_indicators, normalize_ohlc
 from news import fetch_news, now_iso_local
 
 DEFAULT_SYMBOL = os.getenv("SYMBOL", "GC=F")
 OUT_DIR = os.getenv("OUT_DIR", "docs")
 NEWS_LIMIT = int(os.getenv("NEWS_LIMIT", "10"))
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(OUT_DIR, ".cache"))
+HISTORY_MONTHS = 6  # same window for every price source
+
+# Headline keywords: +1 supportive for gold, -1 headwind
+POS_KW = ["dovish", "rate cut", "recession", "geopolitical", "safe haven", "inflation", "war", "conflict"]
+NEG_KW = ["hawkish", "rate hike", "higher yields", "strong dollar", "usd rises", "risk-on"]
+KW_WEIGHT = {**{k: 1 for k in POS_KW}, **{k: -1 for k in NEG_KW}}
 
 # -----------------------------
 # Helpers
 # -----------------------------
-def _fmt(x):
-    if x is None:
-        return ""
-    if isinstance(x, float) and math.isnan(x):
-        return ""
-    if isinstance(x, (int, np.integer)):
-        return str(int(x))
-    if isinstance(x, (float, np.floating)):
-        return f"{float(x):.2f}"
-    return str(x)
+def _build_kw_matcher():
+    """
+    Build a one-pass keyword matcher over KW_WEIGHT.
+    Prefers pyahocorasick; falls back to a single compiled regex alternation.
+    Returns a callable: lowercased title -> set of matched keywords.
+    """
+    try:
+        import ahocorasick
+
+        automaton = ahocorasick.Automaton()
+        for k in KW_WEIGHT:
+            automaton.add_word(k, k)
+        automaton.make_automaton()
+        return lambda t: {k for _, k in automaton.iter(t)}
+    except ImportError:
+        pass
+
+    # Longest first so e.g. "rate cut" is not shadowed by a shorter alternative
+    pat = re.compile("|".join(re.escape(k) for k in sorted(KW_WEIGHT, key=len, reverse=True)))
+    return lambda t: {m.group(0) for m in pat.finditer(t)}
+
+_match_keywords = _build_kw_matcher()
+
+def news_keyword_score(news_items: list[dict]) -> int:
+    titles = [(n.get("title") or "").lower() for n in news_items]
+    return sum(KW_WEIGHT[k] for t in titles for k in _match_keywords(t))
 
 # -----------------------------
 # Price sources
 # -----------------------------
-def _download_yfinance(symbol: str, period: str = "6mo", interval: str = "1d") -> pd.DataFrame:
+def _download_yfinance(symbol: str, period: str = f"{HISTORY_MONTHS}mo", interval: str = "1d") -> pd.DataFrame:
     """
     Primary source: yfinance.
     Note: may fail in GitHub Actions due to Yahoo anti-bot / rate-limit behavior.
@@ -49,27 +73,46 @@ def _download_yfinance(symbol: str, period: str = "6mo", interval: str = "1d") -
         threads=False,
     )
 
-def _download_stooq(stooq_symbol: str = "xauusd") -> pd.DataFrame:
+STOOQ_COLUMNS = {"Date", "Open", "High", "Low", "Close", "Volume"}
+STOOQ_DTYPES = {"Open": "float64", "High": "float64", "Low": "float64", "Close": "float64", "Volume": "float64"}
+
+def _download_stooq(stooq_symbol: str = "xauusd", months: int = HISTORY_MONTHS) -> pd.DataFrame:
     """
-    Fallback source: Stooq daily CSV.
+    Stooq daily CSV, limited to the last `months` months (matches yfinance period).
     Gold spot commonly: xauusd
     Returns DataFrame indexed by Date with columns: Open, High, Low, Close, Volume
     """
-    url = f"https://stooq.com/q/d/l/?s={stooq_symbol}&i=d"
+    today = pd.Timestamp.now().normalize()
+    start = today - pd.DateOffset(months=months)
+    url = f"https://stooq.com/q/d/l/?s={stooq_symbol}&i=d&d1={start:%Y%m%d}&d2={today:%Y%m%d}"
     headers = {"User-Agent": "gold-premarket-plan/1.0"}
-    r = requests.get(url, headers=headers, timeout=30)
+    r = SESSION.get(url, headers=headers, timeout=30)
     r.raise_for_status()
 
-    df = pd.read_csv(io.StringIO(r.text))
+    # No "Date" header (e.g. Stooq's plain-text "No data" reply)
+    header = r.content.split(b"\n", 1)[0].strip().lstrip(b"\xef\xbb\xbf")
+    if b"Date" not in header.split(b","):
+        return pd.DataFrame()
+
+    # "N/D" cells become NaN (rows are dropped later); other bad values raise
+    df = pd.read_csv(
+        io.BytesIO(r.content),
+        usecols=lambda c: c in STOOQ_COLUMNS,
+        parse_dates=["Date"],
+        date_format="%Y-%m-%d",
+        dtype=STOOQ_DTYPES,
+        na_values=["N/D"],
+    )
     if df.empty:
         return df
 
-    if "Date" not in df.columns:
-        return pd.DataFrame()
-
-    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-    df = df.dropna(subset=["Date"])
+    # parse_dates leaves the column as object if any row is malformed
+    if not pd.api.types.is_datetime64_any_dtype(df["Date"]):
+        df["Date"] = pd.to_datetime(df["Date"], format="%Y-%m-%d", errors="coerce")
+        df = df.dropna(subset=["Date"])
     df = df.sort_values("Date").set_index("Date")
+    # Trim as well, in case the d1 bound is ignored
+    df = df[df.index >= start]
 
     # Ensure required OHLC columns exist
     for c in ["Open", "High", "Low", "Close"]:
@@ -82,25 +125,44 @@ def _download_stooq(stooq_symbol: str = "xauusd") -> pd.DataFrame:
     df = df[["Open", "High", "Low", "Close", "Volume"]]
     return df
 
-def download_prices(symbol: str) -> tuple[pd.DataFrame, str]:
-    """
-    Returns (df, source_name)
-    """
-    # 1) Try yfinance first
+STOOQ_FIRST_SYMBOLS = {"xauusd", "gc=f"}
+
+def _try_yfinance(symbol: str):
     try:
         df = _download_yfinance(symbol)
         if df is not None and not df.empty:
             return df, "yfinance"
     except Exception:
         pass
+    return None
 
-    # 2) Fallback to Stooq (xauusd)
+def _try_stooq():
     try:
-        df2 = _download_stooq("xauusd")
-        if df2 is not None and not df2.empty:
-            return df2, "stooq(xauusd)"
+        df = _download_stooq("xauusd")
+        if df is not None and not df.empty:
+            return df, "stooq(xauusd)"
     except Exception:
         pass
+    return None
+
+def download_prices(symbol: str) -> tuple[pd.DataFrame, str]:
+    """
+    Returns (df, source_name)
+    Gold symbols (or PRICE_SOURCE=stooq) go to Stooq first and fall back to yfinance;
+    everything else tries yfinance first and falls back to Stooq (xauusd).
+    """
+    stooq_first = (
+        os.getenv("PRICE_SOURCE", "").strip().lower() == "stooq"
+        or symbol.strip().lower() in STOOQ_FIRST_SYMBOLS
+    )
+    sources = [_try_stooq, lambda: _try_yfinance(symbol)]
+    if not stooq_first:
+        sources.reverse()
+
+    for fetch in sources:
+        res = fetch()
+        if res is not None:
+            return res
 
     return pd.DataFrame(), "none"
 
@@ -111,32 +173,27 @@ def traffic_light_logic(
     df: pd.DataFrame,
     news_items: list[dict],
 ) -> tuple[str, str, list[str], list[dict], int]:
-    last = df.iloc[-1]
-    close = float(last["Close"])
+    row = df.iloc[-1]
+    vals = {k: row[k] for k in ("Close", "MA20", "MA50", "RSI14", "MACDHist", "ATR14") if k in row.index}
+
+    def _f(k, d):
+        v = vals.get(k)
+        # v != v is the NaN check
+        return d if v is None or v != v else float(v)
 
-    ma20 = float(last.get("MA20", np.nan)) if not pd.isna(last.get("MA20", np.nan)) else close
-    ma50 = float(last.get("MA50", np.nan)) if not pd.isna(last.get("MA50", np.nan)) else close
-    rsi14 = float(last.get("RSI14", np.nan)) if not pd.isna(last.get("RSI14", np.nan)) else 50.0
-    macd_hist = float(last.get("MACDHist", np.nan)) if not pd.isna(last.get("MACDHist", np.nan)) else 0.0
-    atr14 = float(last.get("ATR14", np.nan)) if not pd.isna(last.get("ATR14", np.nan)) else 0.0
+    close = float(vals["Close"])
+    ma20 = _f("MA20", close)
+    ma50 = _f("MA50", close)
+    rsi14 = _f("RSI14", 50.0)
+    macd_hist = _f("MACDHist", 0.0)
+    atr14 = _f("ATR14", 0.0)
 
     trend_up = close > ma20 > ma50
     trend_down = close < ma20 < ma50
     momentum_up = (rsi14 >= 55) and (macd_hist > 0)
     momentum_down = (rsi14 <= 45) and (macd_hist < 0)
 
-    neg_kw = ["hawkish", "rate hike", "higher yields", "strong dollar", "usd rises", "risk-on"]
-    pos_kw = ["dovish", "rate cut", "recession", "geopolitical", "safe haven", "inflation", "war", "conflict"]
-
-    score = 0
-    for n in news_items:
-        t = (n.get("title") or "").lower()
-        for k in pos_kw:
-            if k in t:
-                score += 1
-        for k in neg_kw:
-            if k in t:
-                score -= 1
+    score = news_keyword_score(news_items)
 
     if trend_up and momentum_up and score >= 0:
         tl = "GREEN"
@@ -155,8 +212,9 @@ def traffic_light_logic(
         f"新闻情绪粗分 score={score}（仅用于辅助，不作为单独交易依据）。",
     ]
 
-    # Avoid crash when rows < 50
-    atr_mean_50 = float(df["ATR14"].rolling(50).mean().iloc[-1]) if ("ATR14" in df.columns and len(df) >= 50) else atr14
+    # ATR14 is NaN during warmup: average the last 50 valid values, or fall back to atr14
+    atr_valid = df["ATR14"].dropna() if "ATR14" in df.columns else pd.Series(dtype="float64")
+    atr_mean_50 = float(atr_valid.iloc[-50:].mean()) if len(atr_valid) >= 50 else atr14
 
     drivers = [
         {
@@ -237,12 +295,13 @@ def main():
         raise RuntimeError(f"No data returned for symbol={symbol} (all sources failed)")
 
     # Keep only required columns and clean
+    df = normalize_ohlc(df)
     df = df.dropna(subset=["Open", "High", "Low", "Close"])
     if df.empty:
         raise RuntimeError("Price dataframe became empty after cleaning")
 
-    # Enrich indicators
-    df = enrich_indicators(df)
+    # Enrich indicators (cached on input content)
+    df = get_or_compute(df, enrich_indicators, symbol=symbol, cache_dir=CACHE_DIR)
 
     # News
     news_items = fetch_news(limit=NEWS_LIMIT)
@@ -255,20 +314,13 @@ def main():
     last30_df = df.tail(30).copy()
     last30_df = last30_df.reset_index().rename(columns={"index": "Date"})
 
-    last30_rows = []
-    for _, r in last30_df.iterrows():
-        dt = r["Date"]
-        date_str = str(dt.date()) if hasattr(dt, "date") else str(dt)
-        last30_rows.append(
-            {
-                "Date": date_str,
-                "Open": _fmt(r.get("Open")),
-                "High": _fmt(r.get("High")),
-                "Low": _fmt(r.get("Low")),
-                "Close": _fmt(r.get("Close")),
-                "Volume": _fmt(r.get("Volume")),
-            }
-        )
+    ohlc = ["Open", "High", "Low", "Close"]
+    # Native numbers in JSON (rounded to 2dp); missing prices become null
+    num = last30_df[ohlc].astype("float64").round(2)
+    num = num.astype(object).where(num.notna(), None)
+    vol = last30_df["Volume"].fillna(0).astype("int64") if "Volume" in last30_df else 0
+    date = pd.to_datetime(last30_df["Date"]).dt.strftime("%Y-%m-%d")
+    last30_rows = pd.concat([date, num], axis=1).assign(Volume=vol).to_dict(orient="records")
 
     updated = now_iso_local()
     today = datetime.now(timezone.utc).astimezone().date().isoformat()
@@ -297,13 +349,16 @@ def main():
 
     # Write JSON
     json_path = os.path.join(OUT_DIR, "gold_data.json")
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(payload, f, ensure_ascii=False, indent=2)
+    with open(json_path, "wb") as f:
+        f.write(orjson.dumps(payload, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
 
     # Render HTML
+    jinja_cache_dir = os.path.join(CACHE_DIR, "jinja")
+    os.makedirs(jinja_cache_dir, exist_ok=True)
     env = Environment(
         loader=FileSystemLoader(os.path.join("src", "templates")),
         autoescape=True,
+        bytecode_cache=FileSystemBytecodeCache(directory=jinja_cache_dir),
     )
     tpl = env.get_template("report.html")
     html = tpl.render(**payload)
@@ -0,0 +1,58 @@
+import glob
+import hashlib
+import inspect
+import os
+
+import pandas as pd
+
+# Only the most recent closes go into the key (cheap to hash, changes with each new bar)
+KEY_TAIL_ROWS = 512
+
+def _source_digest(fn) -> bytes:
+    """
+    Hash of the module that defines fn, so editing indicator code invalidates old entries.
+    """
+    try:
+        with open(inspect.getsourcefile(fn), "rb") as f:
+            return hashlib.sha256(f.read()).digest()
+    except (OSError, TypeError):
+        return fn.__qualname__.encode()
+
+def cache_key(df: pd.DataFrame, fn, symbol: str = "") -> str:
+    h = hashlib.sha256()
+    h.update(symbol.encode())
+    h.update(_source_digest(fn))
+    h.update(str(len(df)).encode())
+    if len(df):
+        h.update(str(df.index[-1]).encode())
+    h.update(df["Close"].to_numpy("float64")[-KEY_TAIL_ROWS:].tobytes())
+    return h.hexdigest()
+
+def get_or_compute(df: pd.DataFrame, fn, symbol: str = "", cache_dir: str = os.path.join("docs", ".cache")) -> pd.DataFrame:
+    """
+    Return fn(df), reusing the pickle under cache_dir when the key
+    (symbol, row count, last date, recent closes) matches.
+    """
+    key = cache_key(df, fn, symbol)
+
+    path = os.path.join(cache_dir, f"ind_{key}.pkl")
+    out = None
+    if os.path.exists(path):
+        try:
+            out = pd.read_pickle(path)
+        except Exception:
+            out = None
+
+    if out is None:
+        out = fn(df)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            out.to_pickle(path)
+            # Keep only the latest entry on disk
+            for stale in glob.glob(os.path.join(cache_dir, "ind_*.pkl")):
+                if stale != path:
+                    os.remove(stale)
+        except OSError:
+            pass
+
+    return out
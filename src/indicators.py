@@ -1,13 +1,42 @@
 import numpy as np
 import pandas as pd
 
+def _wilder(x: np.ndarray, period: int) -> np.ndarray:
+    """
+    Wilder smoothing (EMA with alpha=1/period), seeded with the simple mean
+    of the first `period` values after any leading NaNs.
+    """
+    n = len(x)
+    out = np.full(n, np.nan)
+    valid = ~np.isnan(x)
+    if not valid.any():
+        return out
+    start = int(valid.argmax())
+    seed_at = start + period - 1
+    if seed_at >= n:
+        return out
+
+    # From the seed on this is exactly ewm(adjust=False): avg = avg*(p-1)/p + x/p
+    tail = x[seed_at:].copy()
+    tail[0] = x[start:seed_at + 1].mean()
+    out[seed_at:] = pd.Series(tail).ewm(alpha=1.0 / period, adjust=False).mean().to_numpy()
+    return out
+
+def _rsi_wilder(close: np.ndarray, period: int) -> np.ndarray:
+    d = np.diff(close, prepend=np.nan)
+    avg_gain = _wilder(np.clip(d, 0.0, None), period)
+    avg_loss = _wilder(np.clip(-d, 0.0, None), period)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    # No losses: 100 if there were gains, 50 for a flat window (neutral, not overbought)
+    flat = avg_loss == 0.0
+    out[flat] = np.where(avg_gain[flat] > 0.0, 100.0, 50.0)
+    return out
+
 def rsi(close: pd.Series, period: int = 14) -> pd.Series:
-    delta = close.diff()
-    gain = (delta.where(delta > 0, 0.0)).rolling(period).mean()
-    loss = (-delta.where(delta < 0, 0.0)).rolling(period).mean()
-    rs = gain / (loss.replace(0, np.nan))
-    out = 100 - (100 / (1 + rs))
-    return out.fillna(method="bfill")
+    out = _rsi_wilder(close.to_numpy(np.float64), period)
+    return pd.Series(out, index=close.index)
 
 def ema(series: pd.Series, span: int) -> pd.Series:
     return series.ewm(span=span, adjust=False).mean()
@@ -19,25 +48,63 @@ def macd(close: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9):
     return macd_line, signal_line, hist
 
 def atr(df: pd.DataFrame, period: int = 14) -> pd.Series:
-    high = df["High"]
-    low = df["Low"]
-    close = df["Close"]
-    prev_close = close.shift(1)
+    h = df["High"].to_numpy(np.float64)
+    l = df["Low"].to_numpy(np.float64)
+    c = df["Close"].to_numpy(np.float64)
+    pc = np.empty_like(c)
+    if len(c):
+        pc[0] = np.nan
+        pc[1:] = c[:-1]
+
+    tr = np.maximum.reduce([h - l, np.abs(h - pc), np.abs(l - pc)])
+    # First bar has no previous close: TR is just High - Low there
+    if len(tr):
+        tr[0] = h[0] - l[0]
+
+    out = _wilder(tr, period)
+    return pd.Series(out, index=df.index)
 
-    tr = pd.concat([
-        (high - low),
-        (high - prev_close).abs(),
-        (low - prev_close).abs()
-    ], axis=1).max(axis=1)
+def _sma_from_cumsum(cs: np.ndarray, nan_cs: np.ndarray, w: int) -> np.ndarray:
+    """
+    Simple moving average from prefix sums (len(x) + 1, leading 0) of the
+    NaN-zeroed values and of the NaN count. Windows containing a NaN are NaN,
+    like rolling(w).mean().
+    """
+    n = len(cs) - 1
+    out = np.full(n, np.nan)
+    if n >= w:
+        out[w - 1:] = (cs[w:] - cs[:-w]) / w
+        out[w - 1:][(nan_cs[w:] - nan_cs[:-w]) > 0] = np.nan
+    return out
 
-    return tr.rolling(period).mean().fillna(method="bfill")
+OHLC = ["Open", "High", "Low", "Close"]
+
+def normalize_ohlc(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Flatten yfinance MultiIndex columns (e.g. ("Close", "GC=F")) and cast OHLC to float64.
+    """
+    if isinstance(df.columns, pd.MultiIndex):
+        df = df.copy()
+        df.columns = df.columns.get_level_values(0)
+    cols = {c: "float64" for c in OHLC if c in df.columns}
+    return df.astype(cols, copy=False)
 
 def enrich_indicators(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    df["MA20"] = df["Close"].rolling(20).mean()
-    df["MA50"] = df["Close"].rolling(50).mean()
-    df["RSI14"] = rsi(df["Close"], 14)
+    df = normalize_ohlc(df).copy()
+    close = df["Close"].to_numpy(np.float64)
+    isnan = np.isnan(close)
+    cs = np.concatenate(([0.0], np.cumsum(np.where(isnan, 0.0, close))))
+    nan_cs = np.concatenate(([0], np.cumsum(isnan)))
+
+    # One shared prefix sum serves both windows
+    ma20 = _sma_from_cumsum(cs, nan_cs, 20)
+    ma50 = _sma_from_cumsum(cs, nan_cs, 50)
+
     macd_line, signal_line, hist = macd(df["Close"])
+
+    df["MA20"] = ma20
+    df["MA50"] = ma50
+    df["RSI14"] = rsi(df["Close"], 14)
     df["MACD"] = macd_line
     df["MACDSignal"] = signal_line
     df["MACDHist"] = hist
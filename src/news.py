@@ -1,17 +1,44 @@
 import os
 import re
 import time
-import requests
 import feedparser
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from functools import lru_cache
+
+from http_client import SESSION
 
 UA = "gold-premarket-plan/1.0 (+https://github.com/)"
+FEED_TIMEOUT = 8
+
+_WS_RE = re.compile(r"\s+")
+_TAG_RE = re.compile(r"<[^>]+>")
 
 def _clean(text: str) -> str:
     if not text:
         return ""
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
+    return _WS_RE.sub(" ", text).strip()
+
+def _fetch_feed(url: str, limit: int) -> list[dict]:
+    """
+    抓取单个 RSS 源；用 requests 控制超时（feedparser 自身不限时），失败返回空列表。
+    """
+    try:
+        r = SESSION.get(url, headers={"User-Agent": UA}, timeout=FEED_TIMEOUT)
+        r.raise_for_status()
+        d = feedparser.parse(r.content)
+        return [
+            {
+                "source": d.feed.get("title", url),
+                "title": _clean(e.get("title", "")),
+                "url": e.get("link", ""),
+                "published": _clean(e.get("published", "")) or _clean(e.get("updated", "")),
+                "summary": _clean(_TAG_RE.sub("", e.get("summary", "")))[:240]
+            }
+            for e in d.entries[:limit]
+        ]
+    except Exception:
+        return []
 
 def fetch_news_rss(limit: int = 10):
     """
@@ -23,20 +50,10 @@ def fetch_news_rss(limit: int = 10):
         "https://www.investing.com/rss/news_11.rss",       # Investing.com commodities (可能受限)
     ]
 
-    items = []
-    for url in feeds:
-        try:
-            d = feedparser.parse(url)
-            for e in d.entries[:limit]:
-                items.append({
-                    "source": d.feed.get("title", url),
-                    "title": _clean(e.get("title", "")),
-                    "url": e.get("link", ""),
-                    "published": _clean(e.get("published", "")) or _clean(e.get("updated", "")),
-                    "summary": _clean(re.sub("<[^>]+>", "", e.get("summary", "")))[:240]
-                })
-        except Exception:
-            continue
+    # 并发抓取，总耗时约等于最慢的一个源
+    with ThreadPoolExecutor(max_workers=len(feeds)) as ex:
+        results = list(ex.map(lambda url: _fetch_feed(url, limit), feeds))
+    items = [x for r in results for x in r]
 
     # 去重
     seen = set()
@@ -67,7 +84,7 @@ def fetch_news_newsapi(query: str = "gold OR XAU OR bullion OR fed OR inflation"
         "apiKey": key,
     }
     headers = {"User-Agent": UA}
-    r = requests.get(endpoint, params=params, headers=headers, timeout=20)
+    r = SESSION.get(endpoint, params=params, headers=headers, timeout=20)
     r.raise_for_status()
     data = r.json()
     out = []
@@ -81,16 +98,37 @@ def fetch_news_newsapi(query: str = "gold OR XAU OR bullion OR fed OR inflation"
         })
     return out
 
+NEWS_CACHE_TTL = 300
+
+def _fetch_news_impl(limit: int = 10):
+    news = fetch_news_newsapi(limit=limit)
+    if news:
+        return news
+    return fetch_news_rss(limit=limit)
+
+class _NoNews(Exception):
+    """空结果：抛出以跳过 lru_cache，不缓存。"""
+
+@lru_cache(maxsize=8)
+def _fetch_news_cached(limit: int, bucket: int):
+    news = _fetch_news_impl(limit)
+    if not news:
+        raise _NoNews()
+    return tuple(news)
+
 def fetch_news(limit: int = 10):
     """
     自动策略：
     - 有 NEWSAPI_KEY：优先 NewsAPI
     - 否则：RSS
+    同一进程内按 5 分钟时间桶缓存结果，避免重复请求；空结果不缓存。
     """
-    news = fetch_news_newsapi(limit=limit)
-    if news:
-        return news
-    return fetch_news_rss(limit=limit)
+    try:
+        cached = _fetch_news_cached(limit, int(time.time() // NEWS_CACHE_TTL))
+    except _NoNews:
+        return []
+    # 返回副本，调用方修改条目不会影响缓存
+    return [dict(x) for x in cached]
 
 def now_iso_local():
     # GitHub Actions 通常是 UTC，展示用 ISO